@@ -1,17 +1,13 @@
+import os
+import re
+import time
 import numpy as np
 import traceback
 
-# 1. 尝试导入 OpenGL 库
-try:
-    import pyqtgraph.opengl as gl
-    OPENGL_AVAILABLE = True
-except ImportError as e:
-    OPENGL_AVAILABLE = False
-    OPENGL_ERROR = str(e)
-
-from AnyQt.QtWidgets import QSizePolicy, QLabel, QScrollArea, QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QToolTip
-from AnyQt.QtCore import Qt, QTimer, QPoint, QEvent
-from AnyQt.QtGui import QMatrix4x4, QVector3D, QVector4D, QColor, QMouseEvent
+from AnyQt.QtWidgets import QSizePolicy, QLabel, QScrollArea, QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QToolTip, \
+    QApplication, QFileDialog
+from AnyQt.QtCore import Qt, QTimer, QPoint, QPointF, QEvent, QCoreApplication
+from AnyQt.QtGui import QMatrix4x4, QVector3D, QVector4D, QColor, QMouseEvent, QPainter
 
 from Orange.data import Table, ContinuousVariable
 from Orange.widgets import gui, widget
@@ -19,6 +15,125 @@ from Orange.widgets.settings import Setting, ContextSetting, DomainContextHandle
 from Orange.widgets.utils.itemmodels import DomainModel
 from Orange.widgets.widget import Input, Output
 
+# 1. OpenGL 库延迟导入：模块加载时不导入 pyqtgraph.opengl，
+#    直到组件首次显示或首次收到数据时才加载，以加快 Orange 画布启动
+gl = None
+OPENGL_ERROR = None
+
+
+def _import_opengl():
+    """按需导入 pyqtgraph.opengl，返回是否可用（结果会被缓存）"""
+    global gl, OPENGL_ERROR
+    if gl is None and OPENGL_ERROR is None:
+        try:
+            import pyqtgraph.opengl as _gl
+            gl = _gl
+        except ImportError as e:
+            OPENGL_ERROR = str(e)
+    return gl is not None
+
+
+def _pyqtgraph_version():
+    import pyqtgraph as pg
+    return tuple(int(p) for p in re.findall(r"\d+", pg.__version__)[:3])
+
+
+# 点标签布局参数 (像素)：屏幕占用网格的格子大小、单个字符的估计宽度和标签高度
+LABEL_CELL_SIZE = 16
+LABEL_CHAR_WIDTH = 7
+LABEL_HEIGHT = 14
+LABEL_MAX_CHARS = 20
+
+# 坐标归一化模式：精确最小/最大值，或基于近似分位数的稳健范围
+RANGE_MINMAX, RANGE_ROBUST = 0, 1
+ROBUST_QUANTILES = (0.01, 0.99)
+SKETCH_CAPACITY = 20000       # 每个属性的抽样上限 (有界内存)
+SKETCH_MIN_FINITE = 500       # 样本中有限值少于此数时不估计分位数
+STREAM_CHUNK_SIZE = 1 << 20   # 流式扫描时每块的行数
+
+class RangeSketch:
+    """
+    流式范围估计：一次扫描中记录精确最小/最大值，
+    并用跳跃式蓄水池抽样 (Algorithm L) 保存至多 capacity 个值来估计分位数。
+    抽样按行进行 (包括缺失值)，只生成与替换次数成正比的随机数；
+    可以对追加的数据块继续调用 update
+    """
+    _BATCH = 1024 # 每次批量生成的跳跃步数
+
+    def __init__(self, capacity=SKETCH_CAPACITY, seed=0):
+        self.capacity = capacity
+        self.sample = np.empty(capacity, dtype=np.float64)
+        self.n_seen = 0 # 已见过的行数
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+        self._log_w = 0.0 # Algorithm L 的 log(W)
+        self._next = None # 下一个被抽中的全局行号
+
+    @property
+    def empty(self):
+        """是否还没有见过任何有限值"""
+        return self.min > self.max
+
+    def update(self, values, finite=None):
+        """追加一块数据；finite 为可选的 np.isfinite(values)，避免重复计算"""
+        values = np.asarray(values)
+        if finite is None:
+            finite = np.isfinite(values)
+        n = len(values)
+        if n == 0:
+            return self
+        if finite.any():
+            self.min = min(self.min, float(np.min(values, where=finite, initial=np.inf)))
+            self.max = max(self.max, float(np.max(values, where=finite, initial=-np.inf)))
+
+        start, end = self.n_seen, self.n_seen + n
+        # 样本未满时直接填充
+        if start < self.capacity:
+            n_fill = min(self.capacity - start, n)
+            self.sample[start:start + n_fill] = values[:n_fill]
+            if start + n_fill == self.capacity:
+                self._log_w = np.log(self._rng.random()) / self.capacity
+                self._next = self.capacity + self._skips(np.array([self._log_w]))[0] - 1
+        if self._next is not None:
+            self._replace(values, start, end)
+        self.n_seen = end
+        return self
+
+    def _skips(self, log_w):
+        # 跳过的行数 + 1；W 下溢时跳跃距离截断，避免整数溢出
+        u = self._rng.random(len(log_w))
+        skips = np.floor(np.log(u) / np.log1p(-np.exp(log_w))) + 1
+        return np.minimum(skips, 2.0 ** 60)
+
+    def _replace(self, values, start, end):
+        while self._next < end:
+            log_w = self._log_w + np.cumsum(
+                np.log(self._rng.random(self._BATCH)) / self.capacity)
+            skips = self._skips(log_w)
+            positions = self._next + np.concatenate(([0.0], np.cumsum(skips)))
+            n_take = int(np.searchsorted(positions, end))
+            n_take = min(n_take, self._BATCH)
+            rows = positions[:n_take].astype(np.int64) - start
+            slots = self._rng.integers(self.capacity, size=n_take)
+            self.sample[slots] = values[rows]
+            # 只消耗已使用的步骤，保持状态与行号一致
+            self._log_w = log_w[n_take - 1]
+            self._next = positions[n_take]
+
+    def quantiles(self, low, high, min_finite=SKETCH_MIN_FINITE):
+        """
+        返回近似分位数 (low, high)。样本按行抽取，缺失值很多的列中有限值可能很少；
+        有限值少于 min_finite 个 (且不是全部数据) 时返回 None，由调用方改用最小/最大值
+        """
+        sample = self.sample[:min(self.n_seen, self.capacity)]
+        sample = sample[np.isfinite(sample)]
+        if len(sample) == 0 or \
+                len(sample) < min_finite and self.n_seen > self.capacity:
+            return None
+        q_low, q_high = np.quantile(sample, [low, high])
+        return float(q_low), float(q_high)
+
 # --- 关键修复：QVector3D 增强版 ---
 # 直接继承 QVector3D 以通过 Qt 的类型检查 (如 crossProduct)
 # 同时添加 x, y, z 属性以兼容 pyqtgraph 的部分代码
@@ -72,6 +187,7 @@ class OWScatterPlot3D(widget.OWWidget):
     attr_z = ContextSetting(None)
     attr_color = ContextSetting(None)
     attr_size = ContextSetting(None)
+    attr_label = ContextSetting(None)
 
     # General Settings
     point_size = Setting(15) 
@@ -83,6 +199,14 @@ class OWScatterPlot3D(widget.OWWidget):
     use_compat_mode = Setting(True)
     use_white_bg = Setting(False) # 白色背景
     show_ticks = Setting(False)   # 显示刻度
+    range_mode = Setting(RANGE_MINMAX) # 坐标/颜色/大小的归一化范围
+    label_count = Setting(30)     # 最多显示的点标签数
+    label_mode = Setting(0)       # 0: 离相机最近, 1: 鼠标附近
+
+    # 图像序列导出
+    export_width = Setting(1024)
+    export_height = Setting(768)
+    export_frames = Setting(36)
 
     # Selection
     selection = Setting(set(), schema_only=True) # 存储选中行的索引
@@ -91,19 +215,36 @@ class OWScatterPlot3D(widget.OWWidget):
         super().__init__()
 
         self.data = None
+        self.view = None # 3D 视图延迟创建，见 _ensure_view
+        self._view_attempted = False
         self.scatterplot_item = None
         self.selection_item = None # 用于显示选中高亮
         self.grid_item = None
         self.axis_item = None
         self.tick_items = [] # 存储刻度标签
+        self.label_items = [] # 点标签的 GLTextItem 池，重复使用而不重建
+        self._cursor_pos = None
         
         # 存储原始数据范围用于显示刻度
         self.data_ranges = {'x': (0, 1), 'y': (0, 1), 'z': (0, 1)}
+        # 实际数据的最小/最大值 (稳健模式下可能超出 data_ranges)
+        self.data_extents = {'x': (0, 1), 'y': (0, 1), 'z': (0, 1)}
+        # 按属性缓存的范围估计，以及 x/y/z 三个坐标轴当前的归一化列，数据改变时清空
+        self._range_cache = {}
+        self._column_cache = {}
         # 存储当前点的3D坐标和对应的行索引，用于Tooltip查找和点击选择
         self.current_points_3d = None 
         self.current_indices = None # 映射: visual_index -> data_row_index
         self.current_colors = None # 存储当前颜色用于高亮时恢复原色
         self.current_sizes = None  # 存储当前大小
+        self.current_label_values = None # 与 current_indices 对应的标签值
+        self._proj_buffers = None # 投影缓冲区，仅在设置了标签属性时分配并复用
+
+        # 相机移动时节流更新标签，避免每个鼠标事件都重新布局
+        self._label_timer = QTimer(self)
+        self._label_timer.setSingleShot(True)
+        self._label_timer.setInterval(50)
+        self._label_timer.timeout.connect(self.update_labels)
         
         # --- GUI Layout ---
         self.controlArea.setFixedWidth(250)
@@ -124,6 +265,12 @@ class OWScatterPlot3D(widget.OWWidget):
             box_axes, self, "attr_z", label="Axis Z:",
             callback=self.replot, model=self.xy_model
         )
+        gui.comboBox(
+            box_axes, self, "range_mode", label="Range:",
+            items=("Min / Max", "Robust (1%-99%)"), callback=self.replot,
+            tooltip="Robust mode scales by approximate quantiles, "
+                    "so outliers do not squash the rest of the data."
+        )
 
         # Appearance
         box_appear = gui.vBox(self.controlArea, "Appearance")
@@ -149,6 +296,23 @@ class OWScatterPlot3D(widget.OWWidget):
             minValue=10, maxValue=100, step=10, callback=self.replot
         )
 
+        # Labels
+        box_labels = gui.vBox(self.controlArea, "Labels")
+        self.l_model = DomainModel(DomainModel.MIXED, placeholder="None")
+        self.cb_attr_label = gui.comboBox(
+            box_labels, self, "attr_label", label="Label:",
+            callback=self.update_label_values, model=self.l_model
+        )
+        gui.hSlider(
+            box_labels, self, "label_count", label="Max Labels",
+            minValue=1, maxValue=200, step=1, callback=self.update_labels
+        )
+        gui.radioButtons(
+            box_labels, self, "label_mode",
+            btnLabels=("Nearest to camera", "Around cursor"),
+            callback=self.update_labels
+        )
+
         # Display
         box_display = gui.vBox(self.controlArea, "Display")
         gui.checkBox(box_display, self, "show_grid", "Show Grid", callback=self.update_scene_elements)
@@ -168,6 +332,15 @@ class OWScatterPlot3D(widget.OWWidget):
         self.btn_reset.clicked.connect(self.reset_camera)
         box_action.layout().addWidget(self.btn_reset)
 
+        # Export
+        box_export = gui.vBox(self.controlArea, "Export")
+        gui.spin(box_export, self, "export_width", 64, 8192, step=64, label="Width:")
+        gui.spin(box_export, self, "export_height", 64, 8192, step=64, label="Height:")
+        gui.spin(box_export, self, "export_frames", 1, 720, label="Frames:")
+        self.btn_export = QPushButton("Export Image Sequence...")
+        self.btn_export.clicked.connect(self.export_dialog)
+        box_export.layout().addWidget(self.btn_export)
+
         # Info Label
         self.lbl_info = QLabel("No Data")
         self.lbl_info.setStyleSheet("color: #aaa; font-weight: bold; margin-top: 10px;")
@@ -177,9 +350,19 @@ class OWScatterPlot3D(widget.OWWidget):
         # Main Area
         self.main_container = gui.vBox(self.mainArea)
         
-        if not OPENGL_AVAILABLE:
+        # 3D 视图在首次显示或首次收到数据时才创建 (showEvent / replot)
+
+    def _ensure_view(self):
+        """按需创建 3D 视图和场景，返回视图是否可用"""
+        if self.view is not None:
+            return True
+        if self._view_attempted:
+            return False
+        self._view_attempted = True # 只尝试一次，避免重复报错
+
+        if not _import_opengl():
             self.show_error(f"PyQtGraph OpenGL module could not be imported.\nError: {OPENGL_ERROR}")
-            return
+            return False
 
         try:
             self.view = gl.GLViewWidget()
@@ -193,10 +376,17 @@ class OWScatterPlot3D(widget.OWWidget):
             self.init_scene()
             self.update_background() # 应用默认背景
             self.reset_camera()
+            return True
             
         except Exception as e:
+            self.view = None
             error_msg = "".join(traceback.format_exception(None, e, e.__traceback__))
             self.show_error(f"Error initializing 3D View:\n{error_msg}")
+            return False
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._ensure_view()
 
     def show_error(self, message):
         lbl = QLabel(message)
@@ -223,16 +413,17 @@ class OWScatterPlot3D(widget.OWWidget):
         self.update_scene_elements()
 
     def reset_camera(self):
-        if hasattr(self, 'view'):
+        if self.view is not None:
             # 使用继承自 QVector3D 的 SafeVector3D
             center = SafeVector3D(0, 0, 0)
             self.view.setCameraPosition(distance=35, elevation=30, azimuth=45)
             self.view.opts['center'] = center
             self.view.update()
+            self.schedule_label_update()
 
     def update_background(self):
         """切换背景颜色（黑/白）"""
-        if hasattr(self, 'view'):
+        if self.view is not None:
             if self.use_white_bg:
                 self.view.setBackgroundColor('w')
                 # 白色背景下，网格设为深灰色
@@ -245,35 +436,40 @@ class OWScatterPlot3D(widget.OWWidget):
                 self.grid_item.setColor(QColor(255, 255, 255, 100))
                 self.lbl_info.setStyleSheet("color: #aaa; font-weight: bold; margin-top: 10px;")
             
-            # 更新刻度颜色
+            # 更新刻度和标签颜色
             self.update_ticks()
+            self.update_labels()
             self.view.update()
 
     def update_scene_elements(self):
-        if hasattr(self, 'grid_item'): self.grid_item.setVisible(self.show_grid)
-        if hasattr(self, 'axis_item'): self.axis_item.setVisible(self.show_axes)
+        if self.view is None:
+            return
+        if self.grid_item: self.grid_item.setVisible(self.show_grid)
+        if self.axis_item: self.axis_item.setVisible(self.show_axes)
         self.view.update()
 
     def update_ticks_visibility(self):
-        """只切换刻度可见性，不重绘"""
-        visible = self.show_ticks
-        for item in self.tick_items:
-            item.setVisible(visible)
+        """只切换刻度可见性，不重绘点"""
+        if self.view is None:
+            return
+        self.update_ticks()
         self.view.update()
 
     def update_ticks(self):
-        """重新生成刻度标签"""
-        # 清除旧刻度
-        for item in self.tick_items:
-            try:
-                self.view.removeItem(item)
-            except:
-                pass
-        self.tick_items = []
-
+        """更新刻度标签：9 个文本项只创建一次，之后只更新文字、位置和颜色"""
+        if self.view is None:
+            return
         if not self.show_ticks:
+            for item in self.tick_items:
+                item.setVisible(False)
             return
 
+        while len(self.tick_items) < 9:
+            item = gl.GLTextItem()
+            self.view.addItem(item)
+            self.tick_items.append(item)
+        items = iter(self.tick_items)
+
         # 刻度颜色：根据背景反色
         text_color = QColor('black') if self.use_white_bg else QColor('white')
         
@@ -287,10 +483,15 @@ class OWScatterPlot3D(widget.OWWidget):
             
             label_text = f"{real_val:.1f}"
             if abs(real_val) > 1000: label_text = f"{real_val:.1e}"
+
+            # 稳健范围之外还有数据时，在端点刻度上标出
+            e_min, e_max = self.data_extents[axis_name]
+            if val_norm == -10 and e_min < r_min: label_text = "≤" + label_text
+            if val_norm == 10 and e_max > r_max: label_text = "≥" + label_text
             
-            item = gl.GLTextItem(pos=pos_3d, text=label_text, color=text_color)
-            self.view.addItem(item)
-            self.tick_items.append(item)
+            item = next(items)
+            item.setData(pos=pos_3d, text=label_text, color=text_color)
+            item.setVisible(True)
 
         for p in positions:
             # X轴刻度 (放在 Z=-11, Y=-11 处)
@@ -300,6 +501,124 @@ class OWScatterPlot3D(widget.OWWidget):
             # Z轴刻度 (放在 X=-11, Y=-11 处)
             create_label(p, 'z', [-11, -11, p])
 
+    # --- Point Labels ---
+
+    def update_label_values(self):
+        """取出当前可视点对应的标签值并重新布局标签"""
+        self.current_label_values = None
+        if self.attr_label is not None and self.data is not None \
+                and self.current_indices is not None:
+            col = self.data.get_column_view(self.attr_label)[0]
+            self.current_label_values = col[self.current_indices]
+        if self.attr_label is None:
+            self._proj_buffers = None # 不显示标签时释放投影缓冲区
+        self.update_labels()
+
+    def schedule_label_update(self):
+        """节流：相机移动期间最多每 50ms 布局一次标签"""
+        if self.attr_label is not None and not self._label_timer.isActive():
+            self._label_timer.start()
+
+    def update_labels(self, size=None):
+        """
+        为有限数量的可见点显示标签，未用到的池中项目只隐藏不删除。
+        size 为布局所用的画面大小 (导出时)，默认为窗口大小
+        """
+        if self.view is None:
+            return
+        shown = 0
+        if self.attr_label is not None and self.current_label_values is not None \
+                and self.current_points_3d is not None:
+            if size is None:
+                size = (self.view.width(), self.view.height())
+            try:
+                shown = self._layout_labels(*size)
+            except Exception as e:
+                shown = 0
+                self.lbl_info.setText(f"Label Error: {str(e)}")
+        for item in self.label_items[shown:]:
+            item.setVisible(False)
+        self.view.update()
+
+    def _label_item(self, i):
+        """返回池中第 i 个文本项，不够时才创建"""
+        while len(self.label_items) <= i:
+            item = gl.GLTextItem()
+            self.view.addItem(item)
+            self.label_items.append(item)
+        return self.label_items[i]
+
+    def _layout_labels(self, w, h):
+        """
+        在 w x h 的画面上选择候选点 (离相机最近或离鼠标最近)，
+        并用屏幕空间占用网格剔除重叠的标签
+        返回: 实际显示的标签数
+        """
+        screen_x, screen_y, depth = self._project_points(w, h)
+
+        # 可见性掩码写入预分配的缓冲区
+        visible, tmp = self._projection_buffers()[3:]
+        np.greater(depth, 0, out=visible)
+        for coords, limit in ((screen_x, w), (screen_y, h)):
+            np.greater_equal(coords, 0, out=tmp)
+            visible &= tmp
+            np.less(coords, limit, out=tmp)
+            visible &= tmp
+        cand = np.flatnonzero(visible)
+        if len(cand) == 0:
+            return 0
+
+        if self.label_mode == 1 and self._cursor_pos is not None:
+            # 鼠标位置是窗口坐标，按画面大小缩放
+            mx = self._cursor_pos.x() * w / max(self.view.width(), 1)
+            my = self._cursor_pos.y() * h / max(self.view.height(), 1)
+            key = (screen_x[cand] - mx) ** 2 + (screen_y[cand] - my) ** 2
+        else:
+            key = depth[cand]
+
+        # 每个网格格子只保留最优的候选点 (O(N))，稠密数据时候选不会挤在少数格子里
+        n_cols = int(w // LABEL_CELL_SIZE) + 1
+        n_rows = int(h // LABEL_CELL_SIZE) + 1
+        cell = (screen_y[cand] // LABEL_CELL_SIZE).astype(np.int64) * n_cols \
+            + (screen_x[cand] // LABEL_CELL_SIZE).astype(np.int64)
+        best = np.full(n_rows * n_cols, np.inf, dtype=key.dtype)
+        np.minimum.at(best, cell, key)
+        is_best = key == best[cell]
+        cand, key, cell = cand[is_best], key[is_best], cell[is_best]
+        _, first = np.unique(cell, return_index=True) # 去掉并列的重复
+        cand, key = cand[first], key[first]
+        cand = cand[np.argsort(key, kind="stable")]
+
+        # 占用网格：标签覆盖的格子被占用后，其他标签不能再使用
+        occupied = np.zeros((n_rows, n_cols), dtype=bool)
+        text_color = QColor('black') if self.use_white_bg else QColor('white')
+
+        shown = 0
+        for i in cand:
+            text = self.attr_label.str_val(self.current_label_values[i])
+            if len(text) > LABEL_MAX_CHARS:
+                text = text[:LABEL_MAX_CHARS - 1] + "…"
+            # 文本从锚点向右、向上绘制
+            x0, y1 = screen_x[i], screen_y[i]
+            x1 = x0 + len(text) * LABEL_CHAR_WIDTH
+            y0 = y1 - LABEL_HEIGHT
+            c0 = int(x0 // LABEL_CELL_SIZE)
+            c1 = min(int(x1 // LABEL_CELL_SIZE), n_cols - 1)
+            r0 = max(int(y0 // LABEL_CELL_SIZE), 0)
+            r1 = int(y1 // LABEL_CELL_SIZE)
+            cells = occupied[r0:r1 + 1, c0:c1 + 1]
+            if cells.any():
+                continue
+            cells[:] = True
+
+            item = self._label_item(shown)
+            item.setData(pos=self.current_points_3d[i], text=text, color=text_color)
+            item.setVisible(True)
+            shown += 1
+            if shown >= self.label_count:
+                break
+        return shown
+
     # --- Interaction Logic (Tooltip & Selection) ---
     
     def eventFilter(self, source, event):
@@ -311,9 +630,91 @@ class OWScatterPlot3D(widget.OWWidget):
         if event.type() == QEvent.MouseButtonPress and self.scatterplot_item is not None:
             if event.button() == Qt.LeftButton:
                 self.handle_click(event.pos(), event.modifiers())
+
+        # 相机或鼠标变化 -> 重新布局标签
+        if event.type() == QEvent.MouseMove:
+            self._cursor_pos = event.pos()
+            # 悬停不移动相机，只有拖动或“鼠标附近”模式才需要重新布局
+            if event.buttons() != Qt.NoButton or self.label_mode == 1:
+                self.schedule_label_update()
+        elif event.type() in (QEvent.Wheel, QEvent.MouseButtonRelease, QEvent.Resize,
+                              QEvent.KeyPress, QEvent.KeyRelease):
+            self.schedule_label_update()
                 
         return super().eventFilter(source, event)
 
+    def _projection_buffers(self):
+        """
+        投影缓冲区：(clip, screen_x, screen_y, 掩码, 临时掩码)。
+        只有设置了标签属性 (相机移动时反复投影) 才按点数分配并保留
+        """
+        n = len(self.current_points_3d)
+        if self.attr_label is None:
+            return self._new_projection_buffers(n)
+        if self._proj_buffers is None or len(self._proj_buffers[0]) != n:
+            self._proj_buffers = self._new_projection_buffers(n)
+        return self._proj_buffers
+
+    @staticmethod
+    def _new_projection_buffers(n):
+        return (
+            np.empty((n, 4), dtype=np.float32),
+            np.empty(n, dtype=np.float32),
+            np.empty(n, dtype=np.float32),
+            np.empty(n, dtype=bool),
+            np.empty(n, dtype=bool),
+        )
+
+    def _mvp_matrix(self, w, h):
+        """视口为 w x h 时的 MVP 矩阵，按行向量约定: clip = [pos, 1] @ M"""
+        view_matrix = self.view.viewMatrix()
+        viewport = (0, 0, w, h)
+        try:
+            proj_matrix = self.view.projectionMatrix(viewport, viewport)
+        except TypeError:
+            # pyqtgraph < 0.14: projectionMatrix(region=None)，视口取自 opts['viewport']
+            saved = self.view.opts['viewport']
+            self.view.opts['viewport'] = viewport
+            try:
+                proj_matrix = self.view.projectionMatrix(viewport)
+            finally:
+                self.view.opts['viewport'] = saved
+        mvp = proj_matrix * view_matrix
+        return np.array(mvp.data(), dtype=np.float32).reshape(4, 4)
+
+    def _project(self, pos, w, h, buffers=None):
+        """
+        把 (N, 3) 坐标投影到 w x h 画面的屏幕坐标
+        返回: (screen_x, screen_y, depth)，depth <= 0 表示在相机后方
+        """
+        if buffers is None:
+            buffers = self._new_projection_buffers(len(pos))
+        # 投影计算：pos @ M[:3] + M[3]，等价于齐次坐标乘法但不需要保存 (N, 4) 副本
+        mvp_np = self._mvp_matrix(w, h)
+        clip, screen_x, screen_y = buffers[:3]
+        np.matmul(pos, mvp_np[:3], out=clip)
+        clip += mvp_np[3]
+        
+        # 透视除法 + 视口变换，全部原地计算
+        depth = clip[:, 3]
+        depth[depth == 0] = 1.0
+        np.divide(clip[:, 0], depth, out=screen_x)
+        screen_x += 1.0
+        screen_x *= w / 2.0
+        np.divide(clip[:, 1], depth, out=screen_y)
+        np.subtract(1.0, screen_y, out=screen_y)
+        screen_y *= h / 2.0
+        return screen_x, screen_y, depth
+
+    def _project_points(self, w=None, h=None):
+        """
+        把 current_points_3d 投影到屏幕坐标 (默认为窗口大小)，结果写入复用的缓冲区，
+        下一次调用会覆盖，调用方不能长期保存
+        """
+        if w is None:
+            w, h = self.view.width(), self.view.height()
+        return self._project(self.current_points_3d, w, h, self._projection_buffers())
+
     def find_nearest_point(self, pos, threshold=20.0):
         """
         根据屏幕坐标 pos (QPoint) 查找最近的 3D 点索引
@@ -327,32 +728,9 @@ class OWScatterPlot3D(widget.OWWidget):
             return None, None
 
         try:
-            # 获取矩阵
-            view_matrix = self.view.viewMatrix()
-            proj_matrix = self.view.projectionMatrix()
-            
-            # 计算 MVP 矩阵
-            mvp = proj_matrix * view_matrix
-            w = self.view.width()
-            h = self.view.height()
+            screen_x, screen_y, _ = self._project_points()
             mx, my = pos.x(), pos.y()
             
-            # 构造 (N, 4) 坐标
-            points = np.column_stack((self.current_points_3d, np.ones(len(self.current_points_3d))))
-            
-            # 投影计算
-            mvp_np = np.array(mvp.data()).reshape(4, 4)
-            clip = points @ mvp_np
-            
-            # 透视除法
-            w_coords = clip[:, 3]
-            w_coords[w_coords == 0] = 1.0
-            ndc = clip[:, :3] / w_coords[:, np.newaxis]
-            
-            # 视口变换
-            screen_x = (ndc[:, 0] + 1) * w / 2.0
-            screen_y = (1 - ndc[:, 1]) * h / 2.0
-            
             # 计算距离
             dists = np.sqrt((screen_x - mx)**2 + (screen_y - my)**2)
             
@@ -406,6 +784,9 @@ class OWScatterPlot3D(widget.OWWidget):
         更新选中的视觉效果：
         保留原色 + 描边/光晕 (通过在后方绘制大号高亮色点，前方绘制原色点实现)
         """
+        if self.view is None:
+            return
+
         # 1. 清理旧的高亮项
         if self.selection_item:
             try:
@@ -527,18 +908,22 @@ class OWScatterPlot3D(widget.OWWidget):
         self.closeContext()
         self.data = data
         self.selection = set() # 数据改变清空选择
+        self._range_cache = {}
+        self._column_cache = {}
         self.commit()
 
         if data is None:
             self.xy_model.set_domain(None)
             self.c_model.set_domain(None)
             self.s_model.set_domain(None)
+            self.l_model.set_domain(None)
             self.replot()
             return
 
         self.xy_model.set_domain(data.domain)
         self.c_model.set_domain(data.domain)
         self.s_model.set_domain(data.domain)
+        self.l_model.set_domain(data.domain)
         
         try:
             self.openContext(data.domain)
@@ -548,6 +933,7 @@ class OWScatterPlot3D(widget.OWWidget):
             self.attr_z = None
             self.attr_color = None
             self.attr_size = None
+            self.attr_label = None
         
         start_idx = 1 if self.xy_model[0] is None else 0
         if not self.attr_x and len(self.xy_model) > start_idx:
@@ -563,6 +949,30 @@ class OWScatterPlot3D(widget.OWWidget):
 
         self.replot()
 
+    def _range_sketch(self, attr):
+        """每个属性只扫描一次：分块流式更新范围估计并缓存"""
+        sketch = self._range_cache.get(attr)
+        if sketch is None:
+            col_data = self.data.get_column_view(attr)[0]
+            sketch = RangeSketch()
+            for start in range(0, len(col_data), STREAM_CHUNK_SIZE):
+                sketch.update(col_data[start:start + STREAM_CHUNK_SIZE])
+            self._range_cache[attr] = sketch
+        return sketch
+
+    def _attr_range(self, attr, sketch=None):
+        """按当前归一化模式返回 (最小值, 最大值)；没有有效值时返回 None"""
+        if sketch is None:
+            sketch = self._range_sketch(attr)
+        if sketch.empty:
+            return None
+        if self.range_mode == RANGE_ROBUST and attr.is_continuous:
+            rng = sketch.quantiles(*ROBUST_QUANTILES)
+            # 超过 98% 的值相同时分位数范围退化，改用实际最小/最大值
+            if rng is not None and rng[0] != rng[1]:
+                return rng
+        return sketch.min, sketch.max
+
     def _get_column_data(self, attr, axis_name='x'):
         if self.data is None:
             return None, None
@@ -570,29 +980,179 @@ class OWScatterPlot3D(widget.OWWidget):
         n_rows = len(self.data)
         if attr is None:
             self.data_ranges[axis_name] = (0, 1) # 默认范围
+            self.data_extents[axis_name] = (0, 1)
             return np.zeros(n_rows, dtype=np.float32), np.ones(n_rows, dtype=bool)
+
+        # 只缓存三个坐标轴当前使用的列；离散属性不受归一化模式影响
+        key = (attr, self.range_mode if attr.is_continuous else None)
+        entry = next((e for e in self._column_cache.values() if e[0] == key), None)
+        if entry is None:
+            try:
+                entry = (key,) + self._normalize_column(attr)
+            except Exception:
+                return None, None
+        self._column_cache[axis_name] = entry
+
+        # 缓存的列是共享的，调用方不能原地修改
+        _, col_data, mask, rng, extent = entry
+        self.data_ranges[axis_name] = rng
+        self.data_extents[axis_name] = extent
+        return col_data, mask
+
+    def _normalize_column(self, attr):
+        """
+        一次分块扫描完成类型转换、有效值掩码和范围估计，再原地映射到 [-10, 10]；
+        稳健模式下超出分位数范围的值被截断到边界
+        返回: (归一化列, 有效值掩码, 映射范围, 实际最小/最大值)
+        """
+        src = self.data.get_column_view(attr)[0]
+        n_rows = len(src)
+        col_data = np.empty(n_rows, dtype=np.float32)
+        mask = np.empty(n_rows, dtype=bool)
+
+        sketch = self._range_cache.get(attr)
+        new_sketch = sketch is None
+        if new_sketch:
+            sketch = RangeSketch()
+        for start in range(0, n_rows, STREAM_CHUNK_SIZE):
+            stop = min(start + STREAM_CHUNK_SIZE, n_rows)
+            chunk = col_data[start:stop]
+            chunk[:] = src[start:stop]
+            np.isfinite(chunk, out=mask[start:stop])
+            if new_sketch:
+                sketch.update(chunk, mask[start:stop])
+        if new_sketch:
+            self._range_cache[attr] = sketch
+
+        rng = self._attr_range(attr, sketch)
+        if rng is None:
+            return col_data, mask, (0, 1), (0, 1)
+
+        min_val, max_val = rng
+        if max_val != min_val:
+            scale = 20.0 / (max_val - min_val)
+            offset = -min_val * scale - 10.0
+        else:
+            scale, offset = 1.0, -min_val
+        # 分块原地运算，避免为大表创建临时数组
+        for start in range(0, n_rows, STREAM_CHUNK_SIZE):
+            chunk = col_data[start:start + STREAM_CHUNK_SIZE]
+            chunk *= scale
+            chunk += offset
+            np.clip(chunk, -10.0, 10.0, out=chunk)
+        return col_data, mask, (min_val, max_val), (sketch.min, sketch.max)
+
+    def _prepare_points(self):
+        """
+        计算当前属性下的坐标、颜色和大小，存入 current_* 缓冲区
+        返回: 是否有可绘制的点
+        """
+        # 2. 获取坐标数据
+        x, mx = self._get_column_data(self.attr_x, 'x')
+        y, my = self._get_column_data(self.attr_y, 'y')
+        z, mz = self._get_column_data(self.attr_z, 'z')
+
+        if x is None or y is None or z is None:
+            self.lbl_info.setText("Status: Error reading data")
+            return False
+
+        valid_mask = mx & my & mz
+        n_points = np.sum(valid_mask)
         
-        try:
-            col_data = self.data.get_column_view(attr)[0].astype(np.float32)
-        except Exception:
-            return None, None
+        if n_points == 0:
+            self.lbl_info.setText("Status: 0 valid points")
+            return False
+
+        x_v = x[valid_mask]
+        y_v = y[valid_mask]
+        z_v = z[valid_mask]
         
-        mask = np.isfinite(col_data)
-        valid_data = col_data[mask]
+        # 3. 存储核心数据用于交互
+        pos = np.vstack((x_v, y_v, z_v)).transpose()
+        pos = np.ascontiguousarray(pos, dtype=np.float32)
         
-        if len(valid_data) > 0:
-            min_val = np.min(valid_data)
-            max_val = np.max(valid_data)
-            self.data_ranges[axis_name] = (min_val, max_val)
+        self.current_points_3d = pos
+        self.current_indices = np.where(valid_mask)[0]
+
+        msg = f"Points: {n_points} | Mode: {'Compat' if self.use_compat_mode else 'Normal'}"
+        self.lbl_info.setText(msg)
+
+        # 4. 计算颜色
+        alpha = self.point_opacity / 100.0
+        colors = np.zeros((n_points, 4), dtype=np.float32)
+        colors[:, 0] = 0.0; colors[:, 1] = 1.0; colors[:, 2] = 1.0; colors[:, 3] = alpha # Default Cyan
+
+        if self.attr_color:
+            c_data = self.data.get_column_view(self.attr_color)[0]
+            c_data = c_data[valid_mask]
             
-            if max_val != min_val:
-                col_data = (col_data - min_val) / (max_val - min_val) * 20.0 - 10.0
-            else:
-                col_data = col_data - min_val
+            if self.attr_color.is_discrete:
+                palette = self.attr_color.colors
+                palette_norm = np.array(palette, dtype=np.float32) / 255.0
+                nan_mask = np.isnan(c_data)
+                indices = c_data.astype(int)
+                # Safe clip
+                indices = np.clip(indices, 0, len(palette)-1)
+                colors[~nan_mask, :3] = palette_norm[indices[~nan_mask]]
+                colors[nan_mask, :3] = 0.5 
+            elif self.attr_color.is_continuous:
+                mask = np.isfinite(c_data)
+                rng = self._attr_range(self.attr_color)
+                if np.any(mask) and rng is not None:
+                    min_v, max_v = rng
+                    if max_v != min_v:
+                        norm = np.clip((c_data - min_v) / (max_v - min_v), 0.0, 1.0)
+                    else:
+                        norm = np.zeros_like(c_data)
+                    # Gradient Blue to Yellow logic or similar
+                    colors[mask, 0] = norm[mask]
+                    colors[mask, 1] = 0.0
+                    colors[mask, 2] = 1.0 - norm[mask]
+        
+        colors[:, 3] = alpha
+        colors = np.ascontiguousarray(colors, dtype=np.float32)
+        self.current_colors = colors # 保存颜色用于高亮恢复
+
+        # 5. 计算大小
+        base_size = self.point_size
+        if self.use_compat_mode:
+            final_base_size = base_size / 30.0 
         else:
-            self.data_ranges[axis_name] = (0, 1)
+            final_base_size = base_size
+
+        sizes = np.full(n_points, final_base_size, dtype=np.float32)
         
-        return col_data, mask
+        if self.attr_size:
+            s_data = self.data.get_column_view(self.attr_size)[0]
+            s_data = s_data[valid_mask]
+            mask = np.isfinite(s_data)
+            rng = self._attr_range(self.attr_size)
+            if np.any(mask) and rng is not None:
+                min_v, max_v = rng
+                if max_v != min_v:
+                    norm = np.clip((s_data - min_v) / (max_v - min_v), 0.0, 1.0)
+                    sizes[mask] = final_base_size * (0.5 + 1.5 * norm)
+        
+        sizes = np.ascontiguousarray(sizes, dtype=np.float32)
+        self.current_sizes = sizes # 保存大小
+        return True
+
+    def _update_overlays(self):
+        """点数据变化后更新选区高亮、旋转中心、刻度和标签"""
+        pos = self.current_points_3d
+
+        # 恢复选区视觉
+        self.update_selection_visuals()
+
+        center_x = float(np.mean(pos[:, 0]))
+        center_y = float(np.mean(pos[:, 1]))
+        center_z = float(np.mean(pos[:, 2]))
+        
+        center = SafeVector3D(center_x, center_y, center_z)
+        self.view.opts['center'] = center
+        
+        self.update_ticks()
+        self.update_label_values()
 
     def replot(self):
         # 1. 清理旧数据
@@ -606,104 +1166,28 @@ class OWScatterPlot3D(widget.OWWidget):
             except: pass
             self.selection_item = None
 
+        self.current_indices = None
+        self.current_label_values = None
+        for item in self.label_items:
+            item.setVisible(False)
+
         if self.data is None or not (self.attr_x and self.attr_y):
             self.lbl_info.setText("Status: No Data / Axes Missing")
             return
 
-        # 2. 获取坐标数据
-        x, mx = self._get_column_data(self.attr_x, 'x')
-        y, my = self._get_column_data(self.attr_y, 'y')
-        z, mz = self._get_column_data(self.attr_z, 'z')
-
-        if x is None or y is None or z is None:
-            self.lbl_info.setText("Status: Error reading data")
-            return
-
-        valid_mask = mx & my & mz
-        n_points = np.sum(valid_mask)
-        
-        if n_points == 0:
-            self.lbl_info.setText("Status: 0 valid points")
+        if not self._ensure_view():
             return
 
         try:
-            x_v = x[valid_mask]
-            y_v = y[valid_mask]
-            z_v = z[valid_mask]
-            
-            # 3. 存储核心数据用于交互
-            pos = np.vstack((x_v, y_v, z_v)).transpose()
-            pos = np.ascontiguousarray(pos, dtype=np.float32)
-            
-            self.current_points_3d = pos
-            self.current_indices = np.where(valid_mask)[0]
-
-            msg = f"Points: {n_points} | Mode: {'Compat' if self.use_compat_mode else 'Normal'}"
-            self.lbl_info.setText(msg)
-
-            # 4. 计算颜色
-            alpha = self.point_opacity / 100.0
-            colors = np.zeros((n_points, 4), dtype=np.float32)
-            colors[:, 0] = 0.0; colors[:, 1] = 1.0; colors[:, 2] = 1.0; colors[:, 3] = alpha # Default Cyan
-
-            if self.attr_color:
-                c_data = self.data.get_column_view(self.attr_color)[0]
-                c_data = c_data[valid_mask]
-                
-                if self.attr_color.is_discrete:
-                    palette = self.attr_color.colors
-                    palette_norm = np.array(palette, dtype=np.float32) / 255.0
-                    nan_mask = np.isnan(c_data)
-                    indices = c_data.astype(int)
-                    # Safe clip
-                    indices = np.clip(indices, 0, len(palette)-1)
-                    colors[~nan_mask, :3] = palette_norm[indices[~nan_mask]]
-                    colors[nan_mask, :3] = 0.5 
-                elif self.attr_color.is_continuous:
-                    mask = np.isfinite(c_data)
-                    if np.any(mask):
-                        min_v, max_v = np.min(c_data[mask]), np.max(c_data[mask])
-                        if max_v != min_v:
-                            norm = (c_data - min_v) / (max_v - min_v)
-                        else:
-                            norm = np.zeros_like(c_data)
-                        # Gradient Blue to Yellow logic or similar
-                        colors[mask, 0] = norm[mask]
-                        colors[mask, 1] = 0.0
-                        colors[mask, 2] = 1.0 - norm[mask]
-            
-            colors[:, 3] = alpha
-            colors = np.ascontiguousarray(colors, dtype=np.float32)
-            self.current_colors = colors # 保存颜色用于高亮恢复
-
-            # 5. 计算大小
-            base_size = self.point_size
-            if self.use_compat_mode:
-                final_base_size = base_size / 30.0 
-            else:
-                final_base_size = base_size
-
-            sizes = np.full(n_points, final_base_size, dtype=np.float32)
-            
-            if self.attr_size:
-                s_data = self.data.get_column_view(self.attr_size)[0]
-                s_data = s_data[valid_mask]
-                mask = np.isfinite(s_data)
-                if np.any(mask):
-                    min_v, max_v = np.min(s_data[mask]), np.max(s_data[mask])
-                    if max_v != min_v:
-                        norm = (s_data - min_v) / (max_v - min_v)
-                        sizes[mask] = final_base_size * (0.5 + 1.5 * norm)
-            
-            sizes = np.ascontiguousarray(sizes, dtype=np.float32)
-            self.current_sizes = sizes # 保存大小
+            if not self._prepare_points():
+                return
 
             # 6. 创建主散点图项
             px_mode = not self.use_compat_mode
             self.scatterplot_item = gl.GLScatterPlotItem(
-                pos=pos, 
-                color=colors, 
-                size=sizes, 
+                pos=self.current_points_3d, 
+                color=self.current_colors, 
+                size=self.current_sizes, 
                 pxMode=px_mode
             )
             
@@ -713,18 +1197,7 @@ class OWScatterPlot3D(widget.OWWidget):
                 self.scatterplot_item.setGLOptions('translucent')
 
             self.view.addItem(self.scatterplot_item)
-            
-            # 恢复选区视觉
-            self.update_selection_visuals()
-
-            center_x = float(np.mean(pos[:, 0]))
-            center_y = float(np.mean(pos[:, 1]))
-            center_z = float(np.mean(pos[:, 2]))
-            
-            center = SafeVector3D(center_x, center_y, center_z)
-            self.view.opts['center'] = center
-            
-            self.update_ticks()
+            self._update_overlays()
             
             QTimer.singleShot(50, self.view.update)
 
@@ -738,9 +1211,213 @@ class OWScatterPlot3D(widget.OWWidget):
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        if hasattr(self, 'view') and self.view:
+        if self.view is not None:
             self.view.update()
 
+    # --- Offscreen Rendering & Export (Scripting API) ---
+
+    def set_axes(self, attr_x, attr_y, attr_z=None):
+        """
+        切换坐标轴属性 (变量或属性名)。已有散点图项时只更新其缓冲区，不调用 replot；
+        没有可绘制的点时保持原来的属性和刻度范围不变
+        返回: 是否有可绘制的点
+        """
+        if self.data is None:
+            return False
+        new_attrs = [self._resolve_attr(a) for a in (attr_x, attr_y, attr_z)]
+        if self.scatterplot_item is None:
+            self.attr_x, self.attr_y, self.attr_z = new_attrs
+            self.replot()
+            return self.scatterplot_item is not None
+        if not (new_attrs[0] and new_attrs[1]):
+            return False
+
+        saved = (self.attr_x, self.attr_y, self.attr_z,
+                 dict(self.data_ranges), dict(self.data_extents))
+        self.attr_x, self.attr_y, self.attr_z = new_attrs
+        if not self._prepare_points():
+            # 仍在显示旧的散点图，属性和刻度范围也恢复为旧值
+            self.attr_x, self.attr_y, self.attr_z, \
+                self.data_ranges, self.data_extents = saved
+            return False
+        self.scatterplot_item.setData(
+            pos=self.current_points_3d,
+            color=self.current_colors,
+            size=self.current_sizes
+        )
+        self._update_overlays()
+        return True
+
+    def _resolve_attr(self, attr):
+        if isinstance(attr, str):
+            return self.data.domain[attr]
+        return attr
+
+    def render_image(self, size=None):
+        """
+        离屏渲染当前场景 (不依赖窗口大小)，包括刻度和点标签。
+        GLTextItem 用 QPainter 画在窗口上，无法进入离屏帧缓冲，
+        因此渲染时先隐藏，再按导出分辨率投影后画到图像上
+        返回: (QImage, 渲染耗时秒)
+        """
+        import pyqtgraph as pg
+        self._require_view()
+        if size is None:
+            size = (self.export_width, self.export_height)
+        width, height = map(int, size)
+
+        text_items = [item for item in self.tick_items + self.label_items
+                      if item.visible()]
+        start = time.perf_counter()
+        for item in text_items:
+            item.setVisible(False)
+        try:
+            arr = self.view.renderToArray((width, height))
+        finally:
+            for item in text_items:
+                item.setVisible(True)
+
+        # pyqtgraph >= 0.12.3 返回 (高, 宽, 4) 的 BGRA 数组，更早的版本为 (宽, 高, 4)
+        transpose = _pyqtgraph_version() < (0, 12, 3)
+        image = pg.makeQImage(arr, alpha=True, transpose=transpose)
+        self._draw_text_items(image, text_items, width, height)
+        return image, time.perf_counter() - start
+
+    def _draw_text_items(self, image, items, width, height):
+        """把文本项按导出分辨率投影后画到图像上，与 GLTextItem 一样左下对齐"""
+        if not items:
+            return
+        pos = np.array([item.pos for item in items], dtype=np.float32)
+        screen_x, screen_y, depth = self._project(pos, width, height)
+        painter = QPainter(image)
+        try:
+            painter.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing)
+            for item, x, y, d in zip(items, screen_x, screen_y, depth):
+                if d <= 0:
+                    continue
+                painter.setPen(item.color)
+                painter.setFont(item.font)
+                painter.drawText(QPointF(float(x), float(y)), item.text)
+        finally:
+            painter.end()
+
+    def _require_view(self):
+        """脚本接口使用前确保 3D 视图已创建且有 GL 上下文"""
+        if not self._ensure_view():
+            raise RuntimeError(f"3D view is not available: {OPENGL_ERROR or 'see widget error'}")
+        if not self.view.isValid():
+            raise RuntimeError("3D view has no OpenGL context yet; show the widget first")
+
+    def iter_orbit(self, n_frames=None, size=None):
+        """
+        绕旋转中心转一周并逐帧渲染。帧之间只移动相机，点缓冲区保持不变
+        生成: (帧序号, QImage, 渲染耗时秒)
+        """
+        self._require_view()
+        if n_frames is None:
+            n_frames = self.export_frames
+        if size is None:
+            size = (self.export_width, self.export_height)
+        start_azimuth = self.view.opts['azimuth']
+        try:
+            for i in range(n_frames):
+                self.view.setCameraPosition(
+                    azimuth=start_azimuth + 360.0 * i / n_frames)
+                # 标签按导出分辨率重新布局
+                if self.attr_label is not None:
+                    self.update_labels(size)
+                image, elapsed = self.render_image(size)
+                yield i, image, elapsed
+        finally:
+            self.view.setCameraPosition(azimuth=start_azimuth)
+            self.schedule_label_update()
+
+    def export_orbit(self, directory, n_frames=None, size=None, prefix="frame"):
+        """
+        把旋转序列保存为 PNG 文件 (<prefix>_0000.png, ...)
+        返回: [(文件路径, 渲染耗时秒), ...]
+        """
+        self._require_view()
+        os.makedirs(directory, exist_ok=True)
+        results = []
+        for i, image, elapsed in self.iter_orbit(n_frames, size):
+            path = os.path.join(directory, f"{prefix}_{i:04d}.png")
+            image.save(path)
+            results.append((path, elapsed))
+        return results
+
+    def export_batch(self, triples, directory, n_frames=None, size=None):
+        """
+        依次切换多组 (x, y, z) 属性并导出旋转序列，文件名以属性名为前缀
+        返回: [(文件路径, 渲染耗时秒), ...]
+        """
+        saved = (self.attr_x, self.attr_y, self.attr_z)
+        results = []
+        try:
+            for triple in triples:
+                if not self.set_axes(*triple):
+                    continue
+                names = [a.name if a else "none"
+                         for a in (self.attr_x, self.attr_y, self.attr_z)]
+                prefix = re.sub(r"[^\w.-]+", "_", "_".join(names))
+                results.extend(self.export_orbit(directory, n_frames, size, prefix))
+        finally:
+            self.attr_x, self.attr_y, self.attr_z = saved
+            self.replot()
+        return results
+
+    def export_dialog(self):
+        """导出当前视角的旋转图像序列，并报告每帧渲染时间"""
+        if self.view is None or self.scatterplot_item is None:
+            return
+        directory = QFileDialog.getExistingDirectory(self, "Export Image Sequence")
+        if not directory:
+            return
+        try:
+            results = self.export_orbit(directory)
+        except Exception as e:
+            self.lbl_info.setText(f"Export Error: {str(e)}")
+            return
+        times = [elapsed * 1000 for _, elapsed in results]
+        self.lbl_info.setText(
+            f"Exported {len(results)} frames | "
+            f"Render: {np.mean(times):.1f} ms/frame (max {np.max(times):.1f} ms)")
+
+
+def use_software_gl():
+    """
+    在创建 QApplication 之前调用，使用 Mesa 软件渲染 (llvmpipe)，适用于没有 GPU 的 Linux。
+    会修改整个进程的 os.environ。在 Linux/Mesa 上真正起作用的是 LIBGL_ALWAYS_SOFTWARE，
+    AA_UseSoftwareOpenGL 只在 Windows 上有效。没有显示服务器时，请在 xvfb-run 下运行脚本
+    """
+    os.environ.setdefault("LIBGL_ALWAYS_SOFTWARE", "1")
+    if QApplication.instance() is None:
+        QCoreApplication.setAttribute(Qt.AA_UseSoftwareOpenGL)
+
+
+def render_batch(data, triples, directory, n_frames=36, size=(1024, 768),
+                 software_gl=False):
+    """
+    脚本接口：为每组 (x, y, z) 属性离屏渲染旋转图像序列，例如
+        render_batch(Table("iris"), [("sepal length", "sepal width", "petal length")], "out")
+    software_gl=True 时先调用 use_software_gl() (没有 GPU 的机器)
+    返回: [(文件路径, 渲染耗时秒), ...]
+    """
+    if software_gl:
+        use_software_gl()
+    app = QApplication.instance() or QApplication([])
+    w = OWScatterPlot3D()
+    try:
+        w.set_data(data)
+        w.show() # GL 上下文在窗口显示后才可用
+        app.processEvents()
+        if w.view is None:
+            raise RuntimeError(f"OpenGL is not available: {OPENGL_ERROR}")
+        return w.export_batch(triples, directory, n_frames, size)
+    finally:
+        w.close()
+        w.onDeleteWidget()
+
 if __name__ == "__main__":
     from Orange.widgets.utils.widgetpreview import WidgetPreview
     data = Table("iris")
@@ -0,0 +1,137 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from AnyQt.QtCore import QPoint
+from AnyQt.QtGui import QImage, QColor
+
+from Orange.data import Table, Domain, ContinuousVariable, StringVariable
+from Orange.widgets.tests.base import WidgetTest
+
+from owscatterplot3d import OWScatterPlot3D, RangeSketch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_in_fresh_interpreter(code):
+    """在新的解释器中运行代码，保证 sys.modules 不受其他测试影响"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env,
+        capture_output=True, text=True
+    )
+
+
+class TestStartup(unittest.TestCase):
+    def test_import_does_not_load_opengl(self):
+        result = run_in_fresh_interpreter(
+            "import sys\n"
+            "import owscatterplot3d\n"
+            "assert 'pyqtgraph.opengl' not in sys.modules\n"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_construction_defers_view(self):
+        result = run_in_fresh_interpreter(
+            "import sys\n"
+            "from AnyQt.QtWidgets import QApplication\n"
+            "app = QApplication([])\n"
+            "from owscatterplot3d import OWScatterPlot3D\n"
+            "w = OWScatterPlot3D()\n"
+            "assert w.view is None\n"
+            "assert 'pyqtgraph.opengl' not in sys.modules\n"
+            "w.onDeleteWidget()\n"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+class TestRangeSketch(unittest.TestCase):
+    def test_streaming_quantiles(self):
+        rng = np.random.default_rng(0)
+        x = rng.standard_normal(1_000_000)
+        x[rng.random(len(x)) < 0.1] = np.nan
+        x[0] = 1e6
+        sketch = RangeSketch()
+        for start in range(0, len(x), 100_000):
+            sketch.update(x[start:start + 100_000])
+        self.assertEqual(sketch.min, np.nanmin(x))
+        self.assertEqual(sketch.max, 1e6)
+        np.testing.assert_allclose(
+            sketch.quantiles(0.01, 0.99), np.nanquantile(x, [0.01, 0.99]), atol=0.1)
+
+    def test_mostly_missing_column(self):
+        x = np.full(5_000_000, np.nan)
+        x[::2500] = np.arange(2000)
+        sketch = RangeSketch()
+        for start in range(0, len(x), 1 << 20):
+            sketch.update(x[start:start + (1 << 20)])
+        self.assertEqual((sketch.min, sketch.max), (0, 1999))
+        # 样本中只有极少数有限值，不足以估计分位数
+        self.assertIsNone(sketch.quantiles(0.01, 0.99))
+
+    def test_small_column_quantiles(self):
+        sketch = RangeSketch().update(np.arange(10, dtype=float))
+        self.assertEqual(sketch.quantiles(0, 1), (0, 9))
+
+    def test_no_finite_values(self):
+        sketch = RangeSketch().update(np.full(10, np.nan))
+        self.assertTrue(sketch.empty)
+        self.assertIsNone(sketch.quantiles(0.01, 0.99))
+
+
+class TestPointLabels(WidgetTest):
+    def setUp(self):
+        self.widget = self.create_widget(OWScatterPlot3D)
+
+    def test_dense_cloud_places_all_labels(self):
+        n = 200_000
+        rng = np.random.default_rng(0)
+        domain = Domain([ContinuousVariable(name) for name in "abc"],
+                        metas=[StringVariable("name")])
+        metas = np.arange(n).astype(str).astype(object).reshape(-1, 1)
+        data = Table.from_numpy(domain, rng.uniform(size=(n, 3)), metas=metas)
+        self.send_signal(self.widget.Inputs.data, data)
+
+        w = self.widget
+        w.view.resize(800, 600)
+        w._cursor_pos = QPoint(400, 300)
+        w.attr_label = domain.metas[0]
+        for mode in (0, 1):
+            w.label_mode = mode
+            w.update_label_values()
+            shown = sum(item.visible() for item in w.label_items)
+            self.assertEqual(shown, w.label_count)
+
+
+class TestExport(WidgetTest):
+    def setUp(self):
+        self.widget = self.create_widget(OWScatterPlot3D)
+
+    def test_render_requires_gl_context(self):
+        with self.assertRaises(RuntimeError):
+            self.widget.render_image((320, 240))
+        self.send_signal(self.widget.Inputs.data, Table("iris"))
+        with self.assertRaises(RuntimeError):
+            list(self.widget.iter_orbit(2, (320, 240)))
+
+    def test_tick_labels_drawn_at_export_size(self):
+        w = self.widget
+        w.show_ticks = True
+        self.send_signal(w.Inputs.data, Table("iris"))
+        self.assertEqual(len(w.tick_items), 9)
+
+        image = QImage(640, 480, QImage.Format_ARGB32)
+        image.fill(QColor("black"))
+        w._draw_text_items(image, w.tick_items, 640, 480)
+        arr = np.frombuffer(image.constBits().asstring(image.sizeInBytes()),
+                            dtype=np.uint8).reshape(480, 640, 4)
+        self.assertTrue(arr[..., :3].any())
+
+
+if __name__ == "__main__":
+    unittest.main()